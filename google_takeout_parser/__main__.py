@@ -3,7 +3,7 @@ import json
 from datetime import datetime, date
 import dataclasses
 from typing import Any
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterable, Sequence
 
 import click
 
@@ -100,19 +100,21 @@ def _serialize_default(obj: Any) -> Any:
     raise TypeError(f"No known way to serialize {type(obj)} '{obj}'")
 
 
-def _handle_action(res: list[Any], action: str) -> None:
+def _handle_action(res_iter: Iterable[Any], action: str) -> None:
     if action == "repl":
         import IPython  # type: ignore[import]
 
+        res = list(res_iter)  # noqa: F841, used in the REPL
         click.echo(f"Interact with the export using {click.style('res', 'green')}")
         IPython.embed()  # type: ignore[no-untyped-call]
     elif action == "json":
-        click.echo(json.dumps(res, default=_serialize_default))
+        click.echo(json.dumps(list(res_iter), default=_serialize_default))
     else:
         from collections import Counter
         from pprint import pformat
 
-        click.echo(pformat(Counter([type(t).__name__ for t in res])))
+        # count while consuming the results, so they're never all in memory
+        click.echo(pformat(Counter(type(t).__name__ for t in res_iter)))
 
 
 @main.command(short_help="parse a takeout directory")
@@ -129,7 +131,6 @@ def parse(
     Parse a takeout directory takeout
     """
     from .path_dispatch import TakeoutParser
-    from .log import logger
 
     tp = TakeoutParser(
         takeout_dir,
@@ -139,16 +140,11 @@ def parse(
     tp._warn_if_no_activity()
     filter_type = tuple(FILTER_OPTIONS[ff] for ff in filter_)
     # note: actually no exceptions since since they're dropped
-    if cache:
-        if filter_:
-            logger.warning(
-                "As it would otherwise re-compute every time, filtering happens after loading from cache"
-            )
-        res = list(tp.parse(cache=True))
-        if filter_:
-            res = [r for r in res if isinstance(r, filter_type)]
-    else:
-        res = list(tp.parse(cache=False, filter_type=filter_type))
+    # each type is cached separately, so the filter only loads/parses the matching
+    # caches. Some handlers can return multiple types, so filter the results as well
+    res = tp.parse(cache=cache, filter_type=filter_type)
+    if filter_:
+        res = (r for r in res if isinstance(r, filter_type))
     _handle_action(res, action)
 
 
@@ -170,28 +166,26 @@ def merge(
     from .models import DEFAULT_MODEL_TYPE, Res
     from .log import logger
 
-    res: list[Res[DEFAULT_MODEL_TYPE]] = []
+    res: Iterable[Res[DEFAULT_MODEL_TYPE]]
     filter_type = tuple(FILTER_OPTIONS[ff] for ff in filter_)
     if cache:
         if filter_:
             logger.warning(
                 "As it would otherwise re-compute every time, filtering happens after loading from cache"
             )
-        res = list(cached_merge_takeouts(list(takeout_dir), locale_name=locale))
+        res = cached_merge_takeouts(list(takeout_dir), locale_name=locale)
         if filter_:
-            res = [r for r in res if isinstance(r, filter_type)]
+            res = (r for r in res if isinstance(r, filter_type))
     else:
-        res = list(
-            merge_events(
-                *iter(  # type: ignore
-                    [
-                        TakeoutParser(p, locale_name=locale).parse(
-                            cache=False,
-                            filter_type=filter_type,
-                        )
-                        for p in takeout_dir
-                    ]
-                )
+        res = merge_events(
+            *iter(  # type: ignore
+                [
+                    TakeoutParser(p, locale_name=locale).parse(
+                        cache=False,
+                        filter_type=filter_type,
+                    )
+                    for p in takeout_dir
+                ]
             )
         )
     _handle_action(res, action)
@@ -262,18 +256,24 @@ def move(from_: str, to_dir: str, extract: bool) -> None:
         _safe_shutil_mv(from_, target)
     else:
         assert from_.endswith("zip")
-        zf = zipfile.ZipFile(from_)
-        with tempfile.TemporaryDirectory() as td:
-            click.echo(f"Extracting {from_} to {td}")
-            zf.extractall(path=td)
-            top_level = [f for f in os.listdir(td) if not f.startswith(".")]
-            if len(top_level) == 1 and top_level[0].lower().startswith("takeout"):
-                from_ = os.path.join(td, top_level[0])
-                _safe_shutil_mv(from_, target)
-            else:
+        with zipfile.ZipFile(from_) as zf:
+            # check the index before extracting, so we don't extract a large
+            # zipfile to disk only to find out it has the wrong structure
+            top_level = sorted(
+                {
+                    name.split("/", 1)[0]
+                    for name in zf.namelist()
+                    if not name.startswith(".")
+                }
+            )
+            if not (len(top_level) == 1 and top_level[0].lower().startswith("takeout")):
                 raise RuntimeError(
-                    f"Expected top-level 'Takeout' folder in extracted folder, contents are {top_level}"
+                    f"Expected top-level 'Takeout' folder in zipfile, contents are {top_level}"
                 )
+            with tempfile.TemporaryDirectory() as td:
+                click.echo(f"Extracting {from_} to {td}")
+                zf.extractall(path=td)
+                _safe_shutil_mv(os.path.join(td, top_level[0]), target)
 
 
 def _safe_shutil_mv(from_: str, to: str) -> None:
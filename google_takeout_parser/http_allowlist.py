@@ -211,6 +211,9 @@ CONVERT_HTTP_SUFFIX: set[str] = {
 
 
 def _convert_to_https(url: str, logger: logging.Logger | None = None) -> str:
+    # most URLs are already https, skip splitting/parsing the URL for those
+    if url[:5].lower() != "http:":
+        return url
     uu = urlsplit(url)
     if uu.scheme == "http":
         without_www = uu.netloc[4:] if uu.netloc.startswith("www.") else uu.netloc
@@ -67,9 +67,9 @@ def merge_events(*sources: CacheResults) -> CacheResults:
         if isinstance(event, Exception):
             yield event
             continue
-        if event in emitted:
+        # computes the key once, instead of once for the check and once to add
+        if not emitted.add_if_not_present(event):
             continue
-        emitted.add(event)
         yield event
     logger.debug(
         f"TakeoutParse merge: received {count} events, removed {count - len(emitted)} duplicates"
@@ -53,13 +53,16 @@ class KeepAnnotation(NamedTuple):
 
 # fmt: off
 class BaseEvent(Protocol):
+    # empty, so that the slotted models below don't get a __dict__
+    __slots__ = ()
+
     @property
     def key(self) -> Any:
         ...
 # fmt: on
 
 
-@dataclass
+@dataclass(slots=True)
 class Activity(BaseEvent):
     header: str
     title: str
@@ -87,7 +90,7 @@ class Activity(BaseEvent):
         return self.header, self.title, int(self.time.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class YoutubeComment(BaseEvent):
     """
     NOTE: this was the old format, the takeout.google.com returns a CSV file now instead, which is the model CSVYoutubeComment below
@@ -102,7 +105,7 @@ class YoutubeComment(BaseEvent):
         return int(self.dt.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class CSVYoutubeComment(BaseEvent):
     commentId: str
     channelId: str
@@ -128,7 +131,7 @@ class CSVYoutubeComment(BaseEvent):
 # considered reusing model above, but might be confusing
 # and its useful to know if a message was from a livestream
 # or a VOD
-@dataclass
+@dataclass(slots=True)
 class CSVYoutubeLiveChat(BaseEvent):
     """
     this is very similar to CSVYoutubeComment, but chatId instead of commentId
@@ -155,7 +158,7 @@ class CSVYoutubeLiveChat(BaseEvent):
         return int(self.dt.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class LikedYoutubeVideo(BaseEvent):
     title: str
     desc: str
@@ -167,7 +170,7 @@ class LikedYoutubeVideo(BaseEvent):
         return int(self.dt.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayStoreAppInstall(BaseEvent):
     title: str
     lastUpdateTime: datetime  # timestamp for when the installation event occurred
@@ -189,7 +192,7 @@ class PlayStoreAppInstall(BaseEvent):
         return int(self.lastUpdateTime.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class Location(BaseEvent):
     lat: float
     lng: float
@@ -204,7 +207,7 @@ class Location(BaseEvent):
 
 
 # this is not cached as a model, its saved as JSON -- its a helper class that placevisit uses
-@dataclass
+@dataclass(slots=True)
 class CandidateLocation:
     lat: float
     lng: float
@@ -232,19 +235,21 @@ class CandidateLocation:
             # at least one of them should be present
             assert semanticType is not None, data
 
+        sourceInfo = data.get("sourceInfo")
+        # positional, in field order -- this is called for every candidate of every PlaceVisit
         return cls(
-            address=data.get("address"),
-            name=data.get("name"),
-            placeId=placeId,
-            semanticType=semanticType,
-            locationConfidence=data.get("locationConfidence"),
-            lat=data["latitudeE7"] / 1e7,
-            lng=data["longitudeE7"] / 1e7,
-            sourceInfoDeviceTag=data.get("sourceInfo", {}).get("deviceTag"),
+            data["latitudeE7"] / 1e7,
+            data["longitudeE7"] / 1e7,
+            data.get("address"),
+            data.get("name"),
+            placeId,
+            semanticType,
+            data.get("locationConfidence"),
+            None if sourceInfo is None else sourceInfo.get("deviceTag"),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PlaceVisit(BaseEvent):
     # these are part of the 'location' key
     lat: float
@@ -275,7 +280,7 @@ class PlaceVisit(BaseEvent):
         return self.lat, self.lng, int(self.startTime.timestamp()), self.visitConfidence
 
 
-@dataclass
+@dataclass(slots=True)
 class ChromeHistory(BaseEvent):
     title: str
     url: Url
@@ -287,7 +292,7 @@ class ChromeHistory(BaseEvent):
         return self.url, int(self.dt.timestamp())
 
 
-@dataclass
+@dataclass(slots=True)
 class Keep(BaseEvent):
     title: str
     updated_dt: datetime
@@ -2,7 +2,9 @@
 Lots of functions to transform the JSON from the Takeout to useful information
 """
 
+import codecs
 import json
+from sys import intern
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Any
@@ -30,29 +32,61 @@ from .common import Res
 from .time_utils import parse_json_utc_date
 
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ModuleNotFoundError:
+    HAS_ORJSON = False
+
+
 def _read_json_data(p: Path) -> Any:
-    try:
-        import orjson
-    except ModuleNotFoundError:
+    if not HAS_ORJSON:
         warnings.warn(
             "orjson not found, it can significantly speed up json parsing. Consider installing via 'pip install orjson'. Falling back onto stdlib json"
         )
-        return json.loads(p.read_text(encoding="utf-8"))
+        # pass bytes, json.loads detects the encoding and decodes it once itself,
+        # read_text would also translate newlines in another pass over the file
+        return json.loads(p.read_bytes())
     else:
-        return orjson.loads(p.read_bytes())
+        data = p.read_bytes()
+        # orjson doesn't support a UTF-8 byte order mark, stdlib json skips it
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8) :]
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than stdlib json, e.g. it rejects lone surrogates
+            # (which can appear in user-generated titles), NaN/Infinity and
+            # overflowing floats. Fall back so the file still parses
+            logger.debug(f"orjson failed to parse '{p}', falling back onto stdlib json")
+            return json.loads(data)
+
+
+def _release_items(items: list[Any]) -> Iterator[Any]:
+    """
+    Yield each item of a decoded JSON list, removing it from the list as it's
+    consumed. For large files (activity, location history), this lets the raw
+    dicts be garbage collected as they're converted to models, instead of
+    the whole decoded document staying in memory until the file is done
+    """
+    items.reverse()
+    while items:
+        yield items.pop()
 
 
 # "YouTube and YouTube Music/history/search-history.json"
 # "YouTube and YouTube Music/history/watch-history.json"
 # This is also the 'My Activity' JSON format
 def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
-    json_data = json.loads(p.read_text(encoding="utf-8"))
+    json_data = _read_json_data(p)
     if not isinstance(json_data, list):
         yield RuntimeError(f"Activity: Top level item in '{p}' isn't a list")
-    for blob in json_data:
+        return
+    for blob in _release_items(json_data):
         try:
             subtitles: list[Subtitles] = []
-            for s in blob.get("subtitles", []):
+            for s in blob.get("subtitles") or ():
                 if not isinstance(s, dict):
                     continue
                 # sometimes it's just empty ("My Activity/Assistant" data circa 2018)
@@ -74,7 +108,9 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
                     if blob["title"].startswith("Visited view-source:"):
                         _header = "Chrome"
                 assert _header is not None, blob
-                header = _header
+                # there are only a few distinct headers/products, intern them so
+                # items share the same string objects instead of one copy per item
+                header = intern(_header)
                 time_str = blob["time"]
 
             yield Activity(
@@ -86,7 +122,7 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
                 subtitles=subtitles,
                 details=[
                     d["name"]
-                    for d in blob.get("details", [])
+                    for d in blob.get("details") or ()
                     if isinstance(d, dict) and "name" in d
                 ],
                 locationInfos=[
@@ -96,73 +132,75 @@ def _parse_json_activity(p: Path) -> Iterator[Res[Activity]]:
                         source=locinfo.get("source"),
                         sourceUrl=convert_to_https_opt(locinfo.get("sourceUrl")),
                     )
-                    for locinfo in blob.get("locationInfos", [])
+                    for locinfo in blob.get("locationInfos") or ()
                 ],
-                products=blob.get("products", []),
+                products=[intern(pr) for pr in blob.get("products") or ()],
             )
         except Exception as e:
             yield e
 
 
 def _parse_likes(p: Path) -> Iterator[Res[LikedYoutubeVideo]]:
-    json_data = json.loads(p.read_text(encoding="utf-8"))
+    json_data = _read_json_data(p)
     if not isinstance(json_data, list):
         yield RuntimeError(f"Likes: Top level item in '{p}' isn't a list")
+        return
     for jlike in json_data:
         try:
+            snippet = jlike["snippet"]
             yield LikedYoutubeVideo(
-                title=jlike["snippet"]["title"],
-                desc=jlike["snippet"]["description"],
+                title=snippet["title"],
+                desc=snippet["description"],
                 link="https://youtube.com/watch?v={}".format(
                     jlike["contentDetails"]["videoId"]
                 ),
-                dt=parse_json_utc_date(jlike["snippet"]["publishedAt"]),
+                dt=parse_json_utc_date(snippet["publishedAt"]),
             )
         except Exception as e:
             yield e
 
 
 def _parse_app_installs(p: Path) -> Iterator[Res[PlayStoreAppInstall]]:
-    json_data = json.loads(p.read_text(encoding="utf-8"))
+    json_data = _read_json_data(p)
     if not isinstance(json_data, list):
         yield RuntimeError(f"App installs: Top level item in '{p}' isn't a list")
+        return
     for japp in json_data:
         try:
+            install = japp["install"]
+            deviceAttribute = install.get("deviceAttribute") or {}
             yield PlayStoreAppInstall(
-                title=japp["install"]["doc"]["title"],
-                deviceName=japp.get("install", {})
-                .get("deviceAttribute", {})
-                .get("deviceDisplayName"),
-                deviceCarrier=japp.get("install", {})
-                .get("deviceAttribute", {})
-                .get("carrier"),
-                deviceManufacturer=japp.get("install", {})
-                .get("deviceAttribute", {})
-                .get("manufacturer"),
-                lastUpdateTime=parse_json_utc_date(japp["install"]["lastUpdateTime"]),
+                title=install["doc"]["title"],
+                deviceName=deviceAttribute.get("deviceDisplayName"),
+                deviceCarrier=deviceAttribute.get("carrier"),
+                deviceManufacturer=deviceAttribute.get("manufacturer"),
+                lastUpdateTime=parse_json_utc_date(install["lastUpdateTime"]),
                 firstInstallationTime=parse_json_utc_date(
-                    japp["install"]["firstInstallationTime"]
+                    install["firstInstallationTime"]
                 ),
             )
         except Exception as e:
             yield e
 
 
-def _parse_timestamp_key(d: dict[str, Any], key: str) -> datetime:
-    if f"{key}Ms" in d:
-        return parse_datetime_millis(d[f"{key}Ms"])
+def _parse_timestamp_key(d: dict[str, Any], ms_key: str, iso_key: str) -> datetime:
+    # older exports have epoch millis (e.g. timestampMs), newer ones the isoformat (e.g. timestamp)
+    ms = d.get(ms_key)
+    if ms is not None:
+        return parse_datetime_millis(ms)
     else:
-        # else should be the isoformat
-        return parse_json_utc_date(d[key])
+        return parse_json_utc_date(d[iso_key])
 
 
 def _parse_location_history(p: Path) -> Iterator[Res[Location]]:
     ### HMMM, seems that all the locations are right after one another. broken? May just be all the location history that google has on me
     ### see numpy.diff(list(map(lambda yy: y.at, filter(lambda y: isinstance(Location), events()))))
     json_data = _read_json_data(p)
-    if "locations" not in json_data:
+    locations = json_data.get("locations")
+    if locations is None:
         yield RuntimeError(f"Locations: no 'locations' key in '{p}'")
-    for loc in json_data.get("locations", []):
+        return
+    for loc in _release_items(locations):
         accuracy = loc.get("accuracy")
         deviceTag = loc.get("deviceTag")
         source = loc.get("source")
@@ -170,10 +208,10 @@ def _parse_location_history(p: Path) -> Iterator[Res[Location]]:
             yield Location(
                 lng=float(loc["longitudeE7"]) / 1e7,
                 lat=float(loc["latitudeE7"]) / 1e7,
-                dt=_parse_timestamp_key(loc, "timestamp"),
+                dt=_parse_timestamp_key(loc, "timestampMs", "timestamp"),
                 accuracy=None if accuracy is None else float(accuracy),
                 deviceTag=None if deviceTag is None else int(deviceTag),
-                source=None if source is None else str(source),
+                source=None if source is None else intern(str(source)),
             )
         except Exception as e:
             yield e
@@ -197,17 +235,20 @@ def _check_required_keys(
 
 
 def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
-    json_data = json.loads(p.read_text(encoding="utf-8"))
+    json_data = _read_json_data(p)
     if not isinstance(json_data, dict):
         yield RuntimeError(f"Locations: Top level item in '{p}' isn't a dict")
-    if "timelineObjects" not in json_data:
+        return
+    timelineObjects = json_data.get("timelineObjects")
+    if timelineObjects is None:
         yield RuntimeError(f"Locations: no 'timelineObjects' key in '{p}'")
-    timelineObjects = json_data.get("timelineObjects", [])
+        return
     for timelineObject in timelineObjects:
-        if "placeVisit" not in timelineObject:
+        # most timeline objects are activitySegments, only look up the key we use
+        placeVisit = timelineObject.get("placeVisit")
+        if placeVisit is None:
             # yield RuntimeError(f"PlaceVisit: no 'placeVisit' key in '{p}'")
             continue
-        placeVisit = timelineObject["placeVisit"]
         missing_key = _check_required_keys(placeVisit, _sem_required_keys)
         if missing_key is not None:
             yield RuntimeError(f"PlaceVisit: no '{missing_key}' key in '{p}'")
@@ -229,14 +270,21 @@ def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
                 placeId is not None
             ), location_json  # this is always present for the actual location
             duration = placeVisit["duration"]
+            otherCandidateLocations: list[CandidateLocation] = []
+            for candidate_json in placeVisit.get("otherCandidateLocations") or ():
+                # a malformed alternative candidate shouldn't drop the whole PlaceVisit
+                try:
+                    otherCandidateLocations.append(
+                        CandidateLocation.from_dict(candidate_json)
+                    )
+                except (KeyError, AssertionError, TypeError) as e:
+                    logger.debug(
+                        f"CandidateLocation: {p}, skipping other candidate {candidate_json}: {e!r}"
+                    )
             yield PlaceVisit(
                 name=location.name,
                 address=location.address,
-                # separators=(",", ":") removes whitespace from json.dumps
-                otherCandidateLocations=[
-                    CandidateLocation.from_dict(pv)
-                    for pv in placeVisit.get("otherCandidateLocations", [])
-                ],
+                otherCandidateLocations=otherCandidateLocations,
                 sourceInfoDeviceTag=location.sourceInfoDeviceTag,
                 placeConfidence=placeVisit.get("placeConfidence"),
                 placeVisitImportance=placeVisit.get("placeVisitImportance"),
@@ -256,8 +304,12 @@ def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
                     if "centerLngE7" in placeVisit
                     else None
                 ),
-                startTime=_parse_timestamp_key(duration, "startTimestamp"),
-                endTime=_parse_timestamp_key(duration, "endTimestamp"),
+                startTime=_parse_timestamp_key(
+                    duration, "startTimestampMs", "startTimestamp"
+                ),
+                endTime=_parse_timestamp_key(
+                    duration, "endTimestampMs", "endTimestamp"
+                ),
                 locationConfidence=location.locationConfidence,
             )
         except Exception as e:
@@ -268,21 +320,25 @@ def _parse_semantic_location_history(p: Path) -> Iterator[Res[PlaceVisit]]:
 
 
 def _parse_chrome_history(p: Path) -> Iterator[Res[ChromeHistory]]:
-    json_data = json.loads(p.read_text(encoding="utf-8"))
-    if "Browser History" not in json_data:
+    json_data = _read_json_data(p)
+    browser_history = json_data.get("Browser History")
+    if browser_history is None:
         yield RuntimeError(f"Chrome/BrowserHistory: no 'Browser History' key in '{p}'")
-    for item in json_data.get("Browser History", []):
+        return
+    for item in browser_history:
         try:
-            time_naive = datetime.fromtimestamp(
-                item["time_usec"] / 10**6, tz=timezone.utc
-            )
+            pageTransition = item.get("page_transition")
             yield ChromeHistory(
                 title=item["title"],
                 # dont convert to https here, this is just the users history
                 # and there's likely lots of items that aren't https
                 url=item["url"],
-                dt=time_naive.replace(tzinfo=timezone.utc),
-                pageTransition=item.get("page_transition"),
+                dt=datetime.fromtimestamp(
+                    item["time_usec"] / 1_000_000, tz=timezone.utc
+                ),
+                pageTransition=(
+                    None if pageTransition is None else intern(pageTransition)
+                ),
             )
         except Exception as e:
             yield e
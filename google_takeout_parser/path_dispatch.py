@@ -14,6 +14,7 @@ from collections.abc import Callable, Iterator, Iterable, Sequence
 from re import Pattern
 
 from collections import defaultdict
+from functools import lru_cache
 
 from cachew import cachew
 
@@ -44,6 +45,8 @@ def _cache_key_to_str(c: CacheKey) -> str:
     return "_".join(sorted(p.__name__ for p in c)).casefold()
 
 
+# cached, since this is called for every file in the dispatch map, and there's only a few handler functions
+@lru_cache(maxsize=None)
 def _handler_type_cache_key(handler: HandlerFunction) -> CacheKey:
     # Take a function like Iterator[Union[Item, Exception]] and return Item
 
@@ -101,6 +104,52 @@ def _cache_key_to_type(c: CacheKey) -> Any:
 
 HandlerMatch = Res[HandlerFunction | None]
 
+# either one combined regex (group name -> handler), or each regex compiled on its own
+CompiledHandlerMap = Union[
+    tuple[Pattern[str], dict[str, HandlerFunction | None]],
+    list[tuple[Pattern[str], HandlerFunction | None]],
+]
+
+
+def _can_combine_regexes(patterns: Iterable[str]) -> bool:
+    """
+    Whether these regexes behave the same when joined into one alternation.
+    Global inline flags (e.g. (?i)), named groups, numbered backreferences and
+    conditionals would error or change meaning once other patterns are
+    prepended, so those fall back to matching each regex separately
+    """
+    for pattern in patterns:
+        try:
+            compiled = re.compile(pattern)
+        except re.error:
+            return False
+        if compiled.flags & ~re.UNICODE or compiled.groupindex:
+            return False
+        if re.search(r"\\[1-9]|\(\?\(", pattern):
+            return False
+    return True
+
+
+def _compile_handler_map(handler_map: HandlerMap) -> CompiledHandlerMap:
+    """
+    Combine all the regexes in a handler map into one alternation, with a named
+    group around each. re tries the alternatives in order, so like checking
+    each regex in turn the first one in the map wins, but each file only
+    needs a single match call
+
+    If the regexes can't be combined (see _can_combine_regexes), compiles each one separately
+    """
+    if not _can_combine_regexes(handler_map):
+        return [(re.compile(prefix), handler) for prefix, handler in handler_map.items()]
+    handler_funcs: dict[str, HandlerFunction | None] = {}
+    parts: list[str] = []
+    for i, (prefix, handler) in enumerate(handler_map.items()):
+        group = f"_handler{i}"
+        handler_funcs[group] = handler
+        parts.append(f"(?P<{group}>{prefix})")
+    return re.compile("|".join(parts)), handler_funcs
+
+
 ErrorPolicy = Literal["yield", "raise", "drop"]
 
 
@@ -238,14 +287,16 @@ class TakeoutParser:
 
         logger.debug(f"Trying to match one of: {expect_one_of}")
 
-        path_names = [p.name for p in self.takeout_dir.iterdir()]
-
-        for activity_dir in expect_one_of:
-            # match regex path
-            for p in path_names:
-                if re.match(activity_dir, str(p)):
-                    logger.debug(f"Matched expected directory: {activity_dir}")
-                    return
+        # match all the regex paths at once, if possible
+        expect_res: list[Pattern[str]]
+        if _can_combine_regexes(expect_one_of):
+            expect_res = [re.compile("|".join(f"(?:{d})" for d in expect_one_of))]
+        else:
+            expect_res = [re.compile(d) for d in expect_one_of]
+        for p in self.takeout_dir.iterdir():
+            if any(expect_re.match(p.name) for expect_re in expect_res):
+                logger.debug(f"Matched expected directory: {p.name}")
+                return
 
         logger.warning(
             f"Warning: given '{self.takeout_dir}', expected one of '{expect_one_of}' to exist, perhaps you passed the wrong location?"
@@ -254,24 +305,37 @@ class TakeoutParser:
     @staticmethod
     def _match_handler(
         relative_path: str,
-        handler: Iterable[tuple[Pattern[str], HandlerFunction | None]],
+        handler: CompiledHandlerMap,
     ) -> HandlerMatch:
         """
         Match one of the handler regexes to a function which parses the file
         """
         # replace OS-specific (e.g. windows) path separator to match the handler
         sf = relative_path.replace(os.sep, "/")
-        for prefix_re, h in handler:
-            # regex match the map (e.g. above)
-            if prefix_re.match(sf) is not None:
-                # could be None, if chosen to ignore
-                if h is None:
-                    return None
-                elif callable(h):
-                    return h
-        else:
+        if isinstance(handler, list):
+            for prefix_re, h in handler:
+                # regex match the map (e.g. above)
+                if prefix_re.match(sf) is not None:
+                    # could be None, if chosen to ignore
+                    if h is None:
+                        return None
+                    elif callable(h):
+                        return h
             return RuntimeError(f"No function to handle parsing {sf}")
 
+        prefix_re, handler_funcs = handler
+        m = prefix_re.match(sf)
+        if m is not None:
+            # the outermost group closes last, so this is the handler regex which matched
+            assert m.lastgroup is not None
+            h = handler_funcs[m.lastgroup]
+            # could be None, if chosen to ignore
+            if h is None:
+                return None
+            elif callable(h):
+                return h
+        return RuntimeError(f"No function to handle parsing {sf}")
+
     def dispatch_map(self) -> dict[Path, HandlerFunction]:
         return self._dispatch_map_pure(
             takeout_dir=self.takeout_dir,
@@ -294,8 +358,7 @@ class TakeoutParser:
         # precompile regexes to avoid compiling every time we try to match a file
         # normally re.match caches them, but it's an lru cache, so we overwhelm it with so many handlers/locales
         compiled_handlers = [
-            [(re.compile(prefix), handler) for prefix, handler in handler_map.items()]
-            for handler_map in handler_maps
+            _compile_handler_map(handler_map) for handler_map in handler_maps
         ]
 
         def iter_relative_paths() -> Iterator[str]:
@@ -360,13 +423,19 @@ class TakeoutParser:
         func_name: str = getattr(handler, "__name__", str(handler))
         logger.info(f"Parsing '{rel_path}' using '{func_name}'")
 
+    def _parse_files(
+        self, path_handlers: list[tuple[Path, HandlerFunction]]
+    ) -> BaseResults:
+        """Parse each file with its handler, in order"""
+        for path, handler in path_handlers:
+            self._log_handler(path, handler)
+            yield from handler(path)
+
     def _parse_raw(self, filter_type: FilterType = None) -> BaseResults:
         """Parse the takeout with no cache. If a filter is specified, only parses those files"""
         handlers = self._group_by_return_type(filter_type=filter_type)
-        for _, result_tuples in handlers.items():
-            for path, itr in result_tuples:
-                self._log_handler(path, itr)
-                yield from itr
+        for _, path_handlers in handlers.items():
+            yield from self._parse_files(path_handlers)
 
     def _handle_errors(self, results: BaseResults) -> BaseResults:
         """Wrap the results and handle any errors according to the policy"""
@@ -400,7 +469,7 @@ class TakeoutParser:
 
     def _group_by_return_type(
         self, filter_type: FilterType = None
-    ) -> dict[CacheKey, list[tuple[Path, BaseResults]]]:
+    ) -> dict[CacheKey, list[tuple[Path, HandlerFunction]]]:
         """
         Groups the dispatch_map by output model type
         If filter_type is provided, only returns that Model
@@ -408,12 +477,12 @@ class TakeoutParser:
         e.g.:
 
         Activity -> [
-            (filepath, iterator that produces activity)
-            (filepath, iterator that produces activity),
-            (filepath, iterator that produces activity),
+            (filepath, function that produces activity)
+            (filepath, function that produces activity),
+            (filepath, function that produces activity),
         ]
         """
-        handlers: dict[CacheKey, list[tuple[Path, BaseResults]]] = defaultdict(list)
+        handlers: dict[CacheKey, list[tuple[Path, HandlerFunction]]] = defaultdict(list)
         ftype: list[type[BaseEvent]] = []
         if filter_type is not None:
             if isinstance(filter_type, Sequence):
@@ -428,17 +497,22 @@ class TakeoutParser:
                     f"Provided '{ftype}' as filter, '{ckey}' doesn't match, ignoring '{path}'..."
                 )
                 continue
-            # call the function -- since the parsers are all generators,
-            # this doesn't run here, it just waits till its consumed
-            handlers[ckey].append((path, handler(path)))
+            handlers[ckey].append((path, handler))
         return dict(handlers)
 
-    def _depends_on(self) -> str:
+    def _depends_on(self, paths: Iterable[Path]) -> str:
         """
-        basename of all files in the takeout directory + google_takeout_version version
+        relative path and size of each file parsed for a cache key + google_takeout_version version
+
+        takeout files aren't modified after they're extracted, so this only
+        changes if files are added/removed/replaced. Only the files which are
+        parsed into this cache key are included, so a change to some other
+        file doesn't invalidate every cache. mtime is not included, since
+        re-extracting the same zipfile (e.g. to a tempdir, with a cachew_identifier)
+        sets new modification times
         """
-        file_index: list[str] = list(
-            sorted([str(p.name) for p in self.takeout_dir.rglob("*")])
+        file_index: list[str] = sorted(
+            f"{p.relative_to(self.takeout_dir)}:{p.stat().st_size}" for p in paths
         )
         # store version at the beginning of hash
         # if pip version changes, invalidates old results and re-computes
@@ -460,16 +534,14 @@ class TakeoutParser:
 
     def _cached_parse(self, filter_type: FilterType = None) -> BaseResults:
         handlers = self._group_by_return_type(filter_type=filter_type)
-        for cache_key, result_tuples in handlers.items():
+        for cache_key, path_handlers in handlers.items():
             _ret_type: Any = _cache_key_to_type(cache_key)
 
             def _func() -> Iterator[Res[_ret_type]]:  # type: ignore[valid-type]
-                for path, itr in result_tuples:
-                    self._log_handler(path, itr)
-                    yield from itr
+                yield from self._parse_files(path_handlers)
 
             cached_itr: Callable[[], BaseResults] = cachew(
-                depends_on=lambda: self._depends_on(),
+                depends_on=lambda: self._depends_on(p for p, _ in path_handlers),
                 cache_path=lambda: self._determine_cache_path(cache_key),
                 force_file=True,
                 logger=logger,
@@ -7,7 +7,12 @@ def parse_datetime_sec(d: str | float | int) -> datetime:
 
 
 def parse_datetime_millis(d: str | float | int) -> datetime:
-    return parse_datetime_sec(int(d) / 1000)
+    # this is called once per Location, so avoid the round trip through a float
+    # and parse_datetime_sec. // floors, so for (pre-1970) negative values
+    # divide the absolute value to keep truncating towards zero like int() did
+    ms = int(d)
+    secs = ms // 1000 if ms >= 0 else -(-ms // 1000)
+    return datetime.fromtimestamp(secs, tz=timezone.utc)
 
 
 if sys.version_info[:2] >= (3, 11):
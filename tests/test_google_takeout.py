@@ -1,5 +1,9 @@
-from google_takeout_parser.path_dispatch import TakeoutParser
+import json
+from pathlib import Path
+
+from google_takeout_parser.path_dispatch import TakeoutParser, _cache_key_to_str
 from google_takeout_parser.locales.main import LOCALES
+from google_takeout_parser.locales.common import HandlerMap
 
 from .common import testdata
 
@@ -32,3 +36,113 @@ def test_structure_ger() -> None:
         LOCALES["DE"],
         LOCALES["EN"],
     ]
+
+
+def _write_takeout(takeout_dir: Path) -> None:
+    files = {
+        "My Activity/Chrome/MyActivity.json": [
+            {
+                "header": "Chrome",
+                "title": "Visited https://example.com",
+                "time": f"2021-12-1{i}T03:04:05.007Z",
+                "products": ["Chrome"],
+            }
+            for i in range(3)
+        ],
+        "My Activity/Search/MyActivity.json": [
+            {
+                "header": "Search",
+                "title": "Searched for python",
+                "time": "2021-12-13T03:04:05.007Z",
+                "products": ["Search"],
+            }
+        ],
+        "Location History/Records.json": {
+            "locations": [
+                {
+                    "latitudeE7": 351234567 + i,
+                    "longitudeE7": -1201234567,
+                    "timestampMs": str(1600000000123 + i * 1000),
+                    "accuracy": 10,
+                    "source": "WIFI",
+                }
+                for i in range(3)
+            ]
+        },
+        "Chrome/BrowserHistory.json": {
+            "Browser History": [
+                {
+                    "title": "Example",
+                    "url": "https://example.com",
+                    "time_usec": 1630468800000000,
+                    "page_transition": "LINK",
+                }
+            ]
+        },
+        # ignored by the handler map
+        "Chrome/Bookmarks.html": "<html></html>",
+    }
+    for rel, data in files.items():
+        fp = takeout_dir / rel
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_text(data if isinstance(data, str) else json.dumps(data))
+
+
+def test_depends_on(tmp_path: Path) -> None:
+    takeout_dir = tmp_path / "Takeout"
+    _write_takeout(takeout_dir)
+    tk = TakeoutParser(takeout_dir, locale_name="EN")
+
+    def _depends() -> dict[str, str]:
+        return {
+            _cache_key_to_str(key): tk._depends_on(p for p, _ in path_handlers)
+            for key, path_handlers in tk._group_by_return_type().items()
+        }
+
+    before = _depends()
+    assert set(before) == {"activity", "location", "chromehistory"}
+
+    # unrelated/ignored files don't change any key
+    (takeout_dir / "Chrome" / "Bookmarks.html").write_text("<html>changed</html>")
+    (takeout_dir / "Chrome" / "Extensions.json").write_text("{}")
+    assert _depends() == before
+
+    # changing the size of the location file only changes that key
+    records = takeout_dir / "Location History" / "Records.json"
+    records.write_text(records.read_text() + "\n")
+    after = _depends()
+    assert after["location"] != before["location"]
+    assert after["activity"] == before["activity"]
+    assert after["chromehistory"] == before["chromehistory"]
+
+
+def test_custom_handler_map(tmp_path: Path) -> None:
+    from google_takeout_parser.parse_json import (
+        _parse_json_activity,
+        _parse_likes,
+        _parse_app_installs,
+    )
+
+    # regexes which can't be combined into one alternation, so each is matched separately
+    handlers: HandlerMap = {
+        r"(?i)my activity/.*\.json": _parse_json_activity,
+        r"(a)\1": None,
+        r"(?P<dir>Foo)/.*": _parse_likes,
+        r"(?P<dir>Bar)/.*": _parse_app_installs,
+    }
+    for rel in [
+        "My Activity/Chrome/MyActivity.json",
+        "aa.txt",
+        "Foo/a.json",
+        "Bar/b.json",
+    ]:
+        fp = tmp_path / rel
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_text("[]")
+
+    tk = TakeoutParser(tmp_path, handlers=handlers)
+    assert tk.dispatch_map() == {
+        tmp_path / "My Activity/Chrome/MyActivity.json": _parse_json_activity,
+        tmp_path / "Foo/a.json": _parse_likes,
+        tmp_path / "Bar/b.json": _parse_app_installs,
+    }
@@ -6,7 +6,7 @@ from collections.abc import Iterator
 
 import pytest
 import google_takeout_parser.parse_json as prj
-from google_takeout_parser import models
+from google_takeout_parser import models, time_utils
 
 
 @pytest.fixture(scope="function")
@@ -55,6 +55,31 @@ def test_parse_activity_json(tmp_path_f: Path) -> None:
     )
 
 
+def test_parse_activity_json_lone_surrogate(tmp_path_f: Path) -> None:
+    # orjson rejects this, stdlib json accepts it
+    contents = '[{"header": "YouTube", "title": "Watched \\ud83d abc", "time": "2021-12-13T03:04:05.007Z"}]'
+    fp = tmp_path_f / "file"
+    fp.write_text(contents)
+    res = list(prj._parse_json_activity(fp))
+    assert len(res) == 1
+    assert isinstance(res[0], models.Activity)
+    assert res[0].title == "Watched \ud83d abc"
+
+
+def test_read_json_data_bom(tmp_path_f: Path) -> None:
+    fp = tmp_path_f / "file"
+    fp.write_bytes('\ufeff{"title": "シュガーソング"}'.encode("utf-8"))
+    assert prj._read_json_data(fp) == {"title": "シュガーソング"}
+
+
+def test_parse_activity_json_not_list(tmp_path_f: Path) -> None:
+    fp = tmp_path_f / "file"
+    fp.write_text('{"header": "Discover", "title": "7 cards in your feed"}')
+    res = list(prj._parse_json_activity(fp))
+    assert len(res) == 1
+    assert isinstance(res[0], RuntimeError)
+
+
 def test_parse_likes_json(tmp_path_f: Path) -> None:
     contents = """[{"contentDetails": {"videoId": "J1tF-DKKt7k", "videoPublishedAt": "2015-10-05T17:23:15.000Z"}, "etag": "GbLczUV2gsP6j0YQgTcYropUbdY", "id": "TExBNkR0bmJaMktKY2t5VFlmWE93UU5BLkoxdEYtREtLdDdr", "kind": "youtube#playlistItem", "snippet": {"channelId": "UCA6DtnbZ2KJckyTYfXOwQNA", "channelTitle": "Title", "description": "\\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 \\nSugar Song and Bitter Step\\n\\u7cd6\\u6b4c\\u548c\\u82e6\\u5473\\u6b65\\u9a5f\\nUNISON SQUARE GARDEN\\n\\u7530\\u6df5\\u667a\\u4e5f\\n\\u8840\\u754c\\u6226\\u7dda\\n\\u5e7b\\u754c\\u6230\\u7dda\\nBlood Blockade Battlefront ED\\nArranged by Maybe\\nScore:https://drive.google.com/open?id=0B9Jb1ks6rtrWSk1hX1U0MXlDSUE\\nThx~~", "playlistId": "LLA6DtnbZ2KJckyTYfXOwQNA", "position": 4, "publishedAt": "2020-07-05T18:27:32.000Z", "resourceId": {"kind": "youtube#video", "videoId": "J1tF-DKKt7k"}, "thumbnails": {"default": {"height": 90, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/default.jpg", "width": 120}, "high": {"height": 360, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/hqdefault.jpg", "width": 480}, "medium": {"height": 180, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/mqdefault.jpg", "width": 320}, "standard": {"height": 480, "url": "https://i.ytimg.com/vi/J1tF-DKKt7k/sddefault.jpg", "width": 640}}, "title": "[Maybe]Blood Blockade Battlefront ED \\u30b7\\u30e5\\u30ac\\u30fc\\u30bd\\u30f3\\u30b0\\u3068\\u30d3\\u30bf\\u30fc\\u30b9\\u30c6\\u30c3\\u30d7 Sugar Song and Bitter Step"}, "status": {"privacyStatus": "public"}}]"""
     fp = tmp_path_f / "file"
@@ -122,6 +147,16 @@ def test_location_old(tmp_path_f: Path) -> None:
     ]
 
 
+def test_parse_datetime_millis() -> None:
+    assert time_utils.parse_datetime_millis("1512947698030") == datetime.datetime(
+        2017, 12, 10, 23, 14, 58, tzinfo=datetime.timezone.utc
+    )
+    # truncates towards zero, same as int(int(d) / 1000)
+    assert time_utils.parse_datetime_millis(-1500) == datetime.datetime(
+        1969, 12, 31, 23, 59, 59, tzinfo=datetime.timezone.utc
+    )
+
+
 def test_location_new(tmp_path_f: Path) -> None:
     contents = '{"locations": [{"latitudeE7": 351324213, "longitudeE7": -1122434441, "accuracy": 10, "deviceTag": -8024144696862913506, "deviceDesignation": "PRIMARY", "timestamp": "2017-12-10T23:14:58.030Z"}]}'
     fp = tmp_path_f / "file"
@@ -274,6 +309,44 @@ def test_semantic_location_history(tmp_path_f: Path) -> None:
     )
 
 
+def test_semantic_location_history_bad_candidate(tmp_path_f: Path) -> None:
+    data = {
+        "timelineObjects": [
+            {
+                "placeVisit": {
+                    "location": {
+                        "latitudeE7": 555555555,
+                        "longitudeE7": -1066666666,
+                        "placeId": "JK4E4P",
+                    },
+                    "duration": {
+                        "startTimestampMs": "1512948565026",
+                        "endTimestampMs": "1512955206106",
+                    },
+                    "otherCandidateLocations": [
+                        # missing longitudeE7, is skipped
+                        {"latitudeE7": 423984239, "placeId": "XPRK4E4P"},
+                        # null coordinates, also skipped
+                        {"latitudeE7": None, "longitudeE7": None, "placeId": "N"},
+                        {
+                            "latitudeE7": 910000000,
+                            "longitudeE7": -1000,
+                            "semanticType": "TYPE_WORK",
+                        },
+                    ],
+                }
+            }
+        ]
+    }
+    fp = tmp_path_f / "file"
+    fp.write_text(json.dumps(data))
+    res = list(prj._parse_semantic_location_history(fp))
+    assert len(res) == 1
+    obj = res[0]
+    assert isinstance(obj, models.PlaceVisit)
+    assert [c.semanticType for c in obj.otherCandidateLocations] == ["TYPE_WORK"]
+
+
 def test_semantic_location_history_2024(tmp_path_f: Path) -> None:
     data = {
         "timelineObjects": [
@@ -17,6 +17,12 @@ def test_convert_to_https(caplog: LogCaptureFixture) -> None:
         url = "https://youtube.com"
         assert _convert_to_https(url) == "https://youtube.com"
 
+        url = "HTTP://youtube.com"
+        assert _convert_to_https(url) == "https://youtube.com"
+
+        url = "android-app://com.google.android.youtube"
+        assert _convert_to_https(url) == "android-app://com.google.android.youtube"
+
         url = "http://maps.google.com/something+else"
         assert _convert_to_https(url) == "https://maps.google.com/something+else"
 